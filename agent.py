@@ -1,6 +1,8 @@
 import os
+import time
 from typing import List, Dict
 from huggingface_hub import InferenceClient
+import capture
 import config
 
 class Agent:
@@ -26,7 +28,7 @@ class Agent:
         Sends a message to the Hugging Face Inference API using InferenceClient.
         If history is provided, it uses that context instead of the internal self.history details.
         """
-        if not self.api_token:
+        if not self.api_token and not config.LLM_STUB:
             return "Error: HF_TOKEN is not set. Please set it to use the agent."
 
         # Use provided history or fallback to internal history (legacy support)
@@ -43,15 +45,15 @@ class Agent:
 
         try:
             # Use General Model
-            response = self.general_client.chat_completion(
+            assistant_message = self._completion(
+                self.general_client,
+                "chat",
                 messages=messages,
                 max_tokens=512,
                 temperature=0.7,
                 top_p=0.9
             )
             
-            assistant_message = response.choices[0].message.content
-            
             if history is None:
                 self.history.append({"role": "assistant", "content": assistant_message})
             
@@ -65,7 +67,7 @@ class Agent:
         Analyzes the CV and Job Description to provide a tailored version.
         USES CODE MODEL.
         """
-        if not self.api_token:
+        if not self.api_token and not config.LLM_STUB:
             return "Error: HF_TOKEN is not set."
 
         prompt = f"""
@@ -117,14 +119,14 @@ class Agent:
 
         try:
             # Use Code Model
-            response = self.code_client.chat_completion(
+            assistant_message = self._completion(
+                self.code_client,
+                "tailor_cv",
                 messages=messages,
                 max_tokens=2048, # More tokens for CV code
                 temperature=0.2, # Lower temp for code precision
                 top_p=0.9
             )
-            
-            assistant_message = response.choices[0].message.content
             # self.history.append({"role": "assistant", "content": assistant_message}) # Skip history for specialized task
             
             return assistant_message
@@ -132,6 +134,33 @@ class Agent:
             print(f"Error tailoring CV: {e}")
             return f"Error: Unable to tailor CV. Details: {e}"
 
+    def _completion(self, client: InferenceClient, kind: str, messages: List[Dict[str, str]], **params) -> str:
+        """
+        Single upstream chat completion. Records call metadata for traffic capture,
+        and is replaced by capture.stub_completion when config.LLM_STUB is set (replay runs).
+        """
+        start = time.perf_counter()
+        content, error = "", None
+        try:
+            if config.LLM_STUB:
+                content = capture.stub_completion()
+            else:
+                response = client.chat_completion(messages=messages, **params)
+                content = response.choices[0].message.content
+            return content
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            capture.record_llm_call(
+                kind=kind,
+                model=client.model,
+                duration_ms=(time.perf_counter() - start) * 1000,
+                prompt_chars=sum(len(m["content"]) for m in messages),
+                response_chars=len(content or ""),
+                error=error,
+            )
+
     def clear_history(self):
         self.history = [{"role": "system", "content": self.system_prompt}]
 
@@ -214,12 +243,14 @@ class Agent:
 
     def _simple_chat(self, prompt: str) -> str:
         """Helper for single-turn requests without history. Uses General Model."""
-        if not self.api_token:
+        if not self.api_token and not config.LLM_STUB:
             return "Error: HF_TOKEN is not set."
             
         try:
             # Use General Model
-            response = self.general_client.chat_completion(
+            return self._completion(
+                self.general_client,
+                "simple",
                 messages=[
                     {"role": "system", "content": self.system_prompt},
                     {"role": "user", "content": prompt}
@@ -228,7 +259,6 @@ class Agent:
                 temperature=0.7,
                 top_p=0.9
             )
-            return response.choices[0].message.content
         except Exception as e:
             print(f"Error in AI request: {e}")
             return f"Error: {e}"
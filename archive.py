@@ -0,0 +1,116 @@
+import asyncio
+import datetime
+from typing import Dict
+
+from sqlalchemy import func, update
+
+import config
+import models
+import database
+
+BATCH_SIZE = 500
+
+
+def compress_legacy_messages(db) -> int:
+    """Rewrites plain-text rows stored before compression existed so they go through CompressedText."""
+    ids = [
+        row.id
+        for row in db.query(models.Message.id).filter(
+            func.typeof(models.Message.content) == "text",
+            func.length(models.Message.content) >= config.MESSAGE_COMPRESS_THRESHOLD,
+        )
+    ]
+    for start in range(0, len(ids), BATCH_SIZE):
+        for msg in db.query(models.Message).filter(models.Message.id.in_(ids[start:start + BATCH_SIZE])):
+            # Explicit UPDATE: assigning the same value to the ORM attribute would be a no-op
+            db.execute(update(models.Message).where(models.Message.id == msg.id).values(content=msg.content))
+        db.commit()
+    return len(ids)
+
+
+def archive_old_messages(db, now: datetime.datetime) -> int:
+    """Moves messages older than MESSAGE_ARCHIVE_AFTER_DAYS from the live table into archived_messages."""
+    if config.MESSAGE_ARCHIVE_AFTER_DAYS <= 0:
+        return 0
+
+    cutoff = now - datetime.timedelta(days=config.MESSAGE_ARCHIVE_AFTER_DAYS)
+    moved = 0
+    while True:
+        batch = db.query(models.Message).filter(models.Message.timestamp < cutoff).order_by(models.Message.id.asc()).limit(BATCH_SIZE).all()
+        if not batch:
+            return moved
+        for msg in batch:
+            db.add(models.ArchivedMessage(
+                original_id=msg.id,
+                user_id=msg.user_id,
+                role=msg.role,
+                content=msg.content,
+                timestamp=msg.timestamp,
+                archived_at=now,
+            ))
+            db.delete(msg)
+        db.commit()
+        moved += len(batch)
+
+
+def purge_expired_archive(db, now: datetime.datetime) -> int:
+    """Applies the retention policy to the cold archive."""
+    if config.MESSAGE_RETENTION_DAYS <= 0:
+        return 0
+
+    cutoff = now - datetime.timedelta(days=config.MESSAGE_RETENTION_DAYS)
+    deleted = db.query(models.ArchivedMessage).filter(models.ArchivedMessage.timestamp < cutoff).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+
+def compact_database(engine=database.engine) -> int:
+    """
+    Returns free pages to the filesystem and reports how many remain on the freelist.
+    The first run switches SQLite to incremental auto-vacuum, which only takes effect after a full VACUUM;
+    later runs use the much cheaper PRAGMA incremental_vacuum.
+    """
+    if engine.dialect.name != "sqlite":
+        return 0
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        mode = conn.exec_driver_sql("PRAGMA auto_vacuum").scalar()
+        if mode != 2: # 2 = INCREMENTAL
+            conn.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.exec_driver_sql("VACUUM")
+        else:
+            # incremental_vacuum frees one page per step; a single cursor.execute() only steps once,
+            # executescript() runs it to completion
+            conn.connection.driver_connection.executescript("PRAGMA incremental_vacuum;")
+        return conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+
+
+def run_maintenance() -> Dict[str, int]:
+    now = datetime.datetime.utcnow()
+    db = database.SessionLocal()
+    try:
+        stats = {
+            "compressed": compress_legacy_messages(db),
+            "archived": archive_old_messages(db, now),
+            "purged": purge_expired_archive(db, now),
+        }
+    finally:
+        db.close()
+    stats["free_pages"] = compact_database()
+    return stats
+
+
+async def maintenance_loop():
+    """
+    Runs run_maintenance shortly after startup, then every MAINTENANCE_INTERVAL_HOURS, in a worker thread.
+    The early first run matters on hosts that restart the process about as often as the interval.
+    """
+    delay = config.MAINTENANCE_STARTUP_DELAY_SECONDS
+    while True:
+        await asyncio.sleep(delay)
+        delay = config.MAINTENANCE_INTERVAL_HOURS * 3600
+        try:
+            stats = await asyncio.to_thread(run_maintenance)
+            print(f"Message maintenance finished: {stats}")
+        except Exception as e:
+            print(f"Error during message maintenance: {e}")
@@ -0,0 +1,217 @@
+import asyncio
+import contextvars
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+from urllib.parse import parse_qsl
+
+from jose import jwt
+from starlette.datastructures import Headers, UploadFile
+from starlette.formparsers import MultiPartParser
+
+import config
+
+# Per-request lists shared with Agent; None outside a captured/replayed request
+_llm_calls: contextvars.ContextVar[Optional[List[dict]]] = contextvars.ContextVar("llm_calls", default=None)
+_stub_calls: contextvars.ContextVar[Optional[List[dict]]] = contextvars.ContextVar("stub_calls", default=None)
+
+REPLAY_LLM_HEADER = "x-replay-llm"
+NUMERIC_RE = re.compile(r"^\d+(\.\d+)?$")
+ID_SEGMENT_RE = re.compile(r"/\d+(?=/|$)")
+STUB_TEXT = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. "
+
+
+def record_llm_call(kind: str, model: str, duration_ms: float, prompt_chars: int, response_chars: int, error: Optional[str] = None):
+    """Called by Agent after each upstream completion."""
+    calls = _llm_calls.get()
+    if calls is not None:
+        calls.append({
+            "kind": kind,
+            "model": model,
+            "duration_ms": round(duration_ms, 2),
+            "prompt_chars": prompt_chars,
+            "response_chars": response_chars,
+            "error": error,
+        })
+
+
+def stub_completion() -> str:
+    """
+    Stand-in for an upstream completion when config.LLM_STUB is set.
+    Replays the latency/size sent by replay.py in the x-replay-llm header, else the synthetic defaults.
+    """
+    calls = _stub_calls.get()
+    call = calls.pop(0) if calls else {}
+    time.sleep(call.get("duration_ms", config.LLM_STUB_LATENCY_MS) / 1000)
+    chars = call.get("response_chars", config.LLM_STUB_RESPONSE_CHARS)
+    return (STUB_TEXT * (chars // len(STUB_TEXT) + 1))[:chars]
+
+
+def _client_id(headers: Headers) -> Optional[str]:
+    """Stable anonymous id per user: a salted hash of the token subject, never the token or email."""
+    authorization = headers.get("authorization", "")
+    if not authorization.lower().startswith("bearer "):
+        return None
+    try:
+        subject = jwt.get_unverified_claims(authorization[7:]).get("sub", "")
+    except Exception:
+        return None
+    return hashlib.sha256(f"{config.SECRET_KEY}:{subject}".encode("utf-8")).hexdigest()[:12]
+
+
+def _json_shape(value):
+    if isinstance(value, dict):
+        return {k: _json_shape(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_json_shape(v) for v in value[:1]]
+    if isinstance(value, str):
+        return len(value)
+    return type(value).__name__
+
+
+async def _body_shape(headers: Headers, body: bytes) -> Optional[dict]:
+    """Describes a request body by field names and sizes only, so no user content is stored."""
+    content_type = headers.get("content-type", "")
+    if not body or len(body) > config.CAPTURE_MAX_BODY_BYTES:
+        return None
+    try:
+        if content_type.startswith("application/json"):
+            return {"json": _json_shape(json.loads(body))}
+        if content_type.startswith("application/x-www-form-urlencoded"):
+            return {"fields": {k: len(v) for k, v in parse_qsl(body.decode("latin-1"))}}
+        if content_type.startswith("multipart/form-data"):
+            async def stream():
+                yield body
+
+            form = await MultiPartParser(headers, stream()).parse()
+            shape = {"fields": {}, "files": {}}
+            for name, value in form.multi_items():
+                if isinstance(value, UploadFile):
+                    shape["files"][name] = {"ext": Path(value.filename or "").suffix, "size": value.size}
+                    await value.close()
+                else:
+                    shape["fields"][name] = len(value)
+            return shape
+    except Exception as e:
+        print(f"Error recording body shape: {e}")
+    return None
+
+
+class CaptureWriter:
+    """Appends records to <directory>/capture.jsonl and rotates it by size."""
+
+    def __init__(self, directory: str = config.CAPTURE_DIR, max_bytes: int = config.CAPTURE_MAX_BYTES, max_files: int = config.CAPTURE_MAX_FILES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self._lock = threading.Lock()
+
+    @property
+    def path(self) -> Path:
+        return self.directory / "capture.jsonl"
+
+    def write(self, record: dict):
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            if self.path.exists() and self.path.stat().st_size + len(line) > self.max_bytes:
+                self._rotate()
+            with open(self.path, "a") as f:
+                f.write(line)
+
+    def _rotate(self):
+        self.path.rename(self.directory / f"capture-{time.time_ns()}.jsonl")
+        rotated = sorted(self.directory.glob("capture-*.jsonl"))
+        for old in rotated[:-self.max_files]:
+            old.unlink()
+
+
+class CaptureMiddleware:
+    """
+    ASGI middleware that records sampled /api/ requests: route template, body shape, status,
+    timing and the LLM calls made while serving it.
+    With config.LLM_STUB set it also feeds replayed LLM latencies to stub_completion.
+    """
+
+    def __init__(self, app, writer: Optional[CaptureWriter] = None, sample_rate: float = config.CAPTURE_SAMPLE_RATE, enabled: bool = config.CAPTURE_ENABLED):
+        self.app = app
+        self.writer = writer or CaptureWriter()
+        self.sample_rate = sample_rate
+        self.enabled = enabled
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith("/api/"):
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        stub_token = None
+        if config.LLM_STUB and REPLAY_LLM_HEADER in headers:
+            try:
+                calls = json.loads(headers[REPLAY_LLM_HEADER])
+            except ValueError:
+                calls = None # Malformed header: fall back to synthetic latencies
+            if isinstance(calls, list):
+                stub_token = _stub_calls.set([call for call in calls if isinstance(call, dict)])
+
+        try:
+            if not self.enabled or random.random() >= self.sample_rate:
+                await self.app(scope, receive, send)
+                return
+            await self._capture(scope, receive, send, headers)
+        finally:
+            if stub_token is not None:
+                _stub_calls.reset(stub_token)
+
+    async def _capture(self, scope, receive, send, headers: Headers):
+        chunks = []
+        response = {"status": 500, "bytes": 0}
+
+        async def capture_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                chunks.append(message.get("body", b""))
+            return message
+
+        async def capture_send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response["bytes"] += len(message.get("body", b""))
+            await send(message)
+
+        calls = []
+        llm_token = _llm_calls.set(calls)
+        started_at = time.time()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, capture_receive, capture_send)
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            _llm_calls.reset(llm_token)
+
+            body = b"".join(chunks)
+            route = scope.get("route")
+            record = {
+                "ts": started_at,
+                "method": scope["method"],
+                "path": getattr(route, "path", None) or ID_SEGMENT_RE.sub("/{id}", scope["path"]),
+                "query": {k: v for k, v in parse_qsl(scope.get("query_string", b"").decode("latin-1")) if NUMERIC_RE.match(v)},
+                "client": _client_id(headers),
+                "content_type": headers.get("content-type", "").split(";")[0] or None,
+                "request_bytes": len(body),
+                "body": await _body_shape(headers, body),
+                "status": response["status"],
+                "response_bytes": response["bytes"],
+                "duration_ms": round(duration_ms, 2),
+                "llm_calls": calls,
+            }
+            try:
+                await asyncio.to_thread(self.writer.write, record)
+            except Exception as e:
+                print(f"Error writing capture record: {e}")
@@ -10,3 +10,36 @@ SYSTEM_PROMPT = """You are a professional career coach specializing in helping f
 
 # Secret Keys
 SECRET_KEY = os.getenv("SECRET_KEY", "supersecretkey") # Change in production
+
+# Saved Jobs Index
+JOB_EMBEDDING_DIM = 2048 # Hashing vectorizer width (float32 per job = 8 KB)
+JOB_INDEX_MMAP_THRESHOLD = int(os.getenv("JOB_INDEX_MMAP_THRESHOLD", "5000")) # Jobs per user before the matrix is memory-mapped
+JOB_INDEX_DIR = os.getenv("JOB_INDEX_DIR", "data/job_index")
+JOB_INDEX_CACHE_USERS = int(os.getenv("JOB_INDEX_CACHE_USERS", "256")) # Per-user matrices kept in memory (LRU)
+
+# Message Storage
+MESSAGE_COMPRESS_THRESHOLD = int(os.getenv("MESSAGE_COMPRESS_THRESHOLD", "512")) # Bytes; shorter messages are stored as plain text
+MESSAGE_ARCHIVE_AFTER_DAYS = int(os.getenv("MESSAGE_ARCHIVE_AFTER_DAYS", "0")) # Opt-in: move to archived_messages after this age (0 = never)
+MESSAGE_RETENTION_DAYS = int(os.getenv("MESSAGE_RETENTION_DAYS", "0")) # Opt-in: delete archived messages after this age (0 = keep forever)
+MAINTENANCE_INTERVAL_HOURS = float(os.getenv("MAINTENANCE_INTERVAL_HOURS", "24")) # Archive + vacuum schedule (0 = disabled)
+MAINTENANCE_STARTUP_DELAY_SECONDS = float(os.getenv("MAINTENANCE_STARTUP_DELAY_SECONDS", "60")) # First run shortly after boot
+
+# Speculative Prefetch
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "false").lower() == "true" # Opt-in: run tool analyses right after /api/update_context
+PREFETCH_WORKERS = int(os.getenv("PREFETCH_WORKERS", "1")) # Dedicated low-priority threads, separate from request handling
+PREFETCH_MAX_PENDING = int(os.getenv("PREFETCH_MAX_PENDING", "16")) # Skip new prefetches while this many are queued or running
+PREFETCH_MAX_PER_HOUR = int(os.getenv("PREFETCH_MAX_PER_HOUR", "20")) # Per-user budget of prefetched LLM calls
+PREFETCH_JD_SETTLE_SECONDS = float(os.getenv("PREFETCH_JD_SETTLE_SECONDS", "5")) # JD is synced while typing; wait for it to settle
+PREFETCH_TTL_SECONDS = float(os.getenv("PREFETCH_TTL_SECONDS", "3600")) # Unused results older than this are dropped and counted as wasted
+PREFETCH_STATS_LOG_SECONDS = float(os.getenv("PREFETCH_STATS_LOG_SECONDS", "600")) # How often hit/wasted counters are printed (0 = never)
+
+# Traffic Capture & Replay
+CAPTURE_ENABLED = os.getenv("CAPTURE_ENABLED", "false").lower() == "true" # Opt-in: record anonymized /api/ request shapes
+CAPTURE_SAMPLE_RATE = float(os.getenv("CAPTURE_SAMPLE_RATE", "0.1")) # Fraction of requests recorded
+CAPTURE_DIR = os.getenv("CAPTURE_DIR", "captures")
+CAPTURE_MAX_BYTES = int(os.getenv("CAPTURE_MAX_BYTES", str(50 * 1024 * 1024))) # Rotate capture.jsonl above this size
+CAPTURE_MAX_FILES = int(os.getenv("CAPTURE_MAX_FILES", "10")) # Rotated files kept
+CAPTURE_MAX_BODY_BYTES = int(os.getenv("CAPTURE_MAX_BODY_BYTES", str(5 * 1024 * 1024))) # Larger bodies are recorded by size only
+LLM_STUB = os.getenv("LLM_STUB", "false").lower() == "true" # Replay only: fake LLM calls with recorded or synthetic latency
+LLM_STUB_LATENCY_MS = float(os.getenv("LLM_STUB_LATENCY_MS", "1500"))
+LLM_STUB_RESPONSE_CHARS = int(os.getenv("LLM_STUB_RESPONSE_CHARS", "1200"))
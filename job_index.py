@@ -0,0 +1,171 @@
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+import config
+import models
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*")
+SIGN_BIT = 0x80000000
+SCORE_BATCH = 4096 # Rows scored per matrix product, keeps memory flat for mmapped indexes
+LOCK_STRIPES = 64 # Fixed pool of rebuild locks, shared by user_id % LOCK_STRIPES
+
+
+def _features(text: str) -> List[str]:
+    words = TOKEN_RE.findall(text.lower())
+    bigrams = [f"{a} {b}" for a, b in zip(words, words[1:])]
+    return words + bigrams
+
+
+def embed(text: str, dim: int = config.JOB_EMBEDDING_DIM) -> np.ndarray:
+    """
+    Hashing-vectorizer embedding of unigrams and bigrams.
+    Computed locally with a stable hash (crc32) so stored vectors stay valid across restarts.
+    Returns an L2-normalised float32 vector, so a dot product is the cosine similarity.
+    """
+    vec = np.zeros(dim, dtype=np.float32)
+    feats = _features(text or "")
+    if not feats:
+        return vec
+
+    hashes = np.fromiter((zlib.crc32(f.encode("utf-8")) for f in feats), dtype=np.uint32, count=len(feats))
+    signs = np.where(hashes & SIGN_BIT, -1.0, 1.0).astype(np.float32)
+    np.add.at(vec, hashes % dim, signs)
+
+    # Sublinear term frequency so long postings don't drown out short ones
+    vec = np.sign(vec) * np.log1p(np.abs(vec))
+    norm = np.linalg.norm(vec)
+    if norm > 0:
+        vec /= norm
+    return vec.astype(np.float32)
+
+
+def to_blob(vec: np.ndarray) -> bytes:
+    return np.ascontiguousarray(vec, dtype=np.float32).tobytes()
+
+
+def from_blob(blob: bytes) -> np.ndarray:
+    return np.frombuffer(blob, dtype=np.float32)
+
+
+class JobIndex:
+    """
+    Per-user matrix of saved-job embeddings.
+    The matrix is only rebuilt when the user's library changes (tracked by row count, max id and newest created_at).
+    Libraries above config.JOB_INDEX_MMAP_THRESHOLD are written to disk and memory-mapped.
+    At most config.JOB_INDEX_CACHE_USERS matrices are kept in memory (least recently ranked are evicted).
+    """
+
+    def __init__(self, directory: str = config.JOB_INDEX_DIR, mmap_threshold: int = config.JOB_INDEX_MMAP_THRESHOLD,
+                 dim: int = config.JOB_EMBEDDING_DIM, cache_users: int = config.JOB_INDEX_CACHE_USERS):
+        self.directory = Path(directory)
+        self.mmap_threshold = mmap_threshold
+        self.dim = dim
+        self.cache_users = cache_users
+        # Short-held lock for the cache; rebuilds only hold the user's striped lock
+        self._lock = threading.Lock()
+        self._user_locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        # user_id -> (signature, ids, matrix), in least-recently-used order
+        self._cache: "OrderedDict[int, Tuple[Tuple[int, int, int], np.ndarray, np.ndarray]]" = OrderedDict()
+
+    def _signature(self, db: Session, user_id: int) -> Tuple[int, int, int]:
+        # created_at covers tables created before saved_jobs used AUTOINCREMENT, where SQLite
+        # reuses the id of a deleted newest row and count/max id alone would not change
+        count, max_id, newest = db.query(
+            func.count(models.SavedJob.id), func.max(models.SavedJob.id), func.max(models.SavedJob.created_at)
+        ).filter(models.SavedJob.user_id == user_id).one()
+        newest_us = int(newest.timestamp() * 1_000_000) if newest else 0
+        return count or 0, max_id or 0, newest_us
+
+    def _rows(self, db: Session, user_id: int):
+        return db.query(models.SavedJob.id, models.SavedJob.embedding).filter(
+            models.SavedJob.user_id == user_id
+        ).order_by(models.SavedJob.id.asc()).yield_per(1000)
+
+    def _build_in_memory(self, db: Session, user_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        ids, vectors = [], []
+        for job_id, blob in self._rows(db, user_id):
+            ids.append(job_id)
+            vectors.append(from_blob(blob))
+        if not ids:
+            return np.empty(0, dtype=np.int64), np.empty((0, self.dim), dtype=np.float32)
+        return np.array(ids, dtype=np.int64), np.vstack(vectors)
+
+    def _build_mmap(self, db: Session, user_id: int, signature: Tuple[int, int, int]) -> Tuple[np.ndarray, np.ndarray]:
+        count, max_id, newest_us = signature
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stem = f"user_{user_id}_{count}_{max_id}_{newest_us}"
+        matrix_path = self.directory / f"{stem}.f32"
+        ids_path = self.directory / f"{stem}.ids.npy"
+
+        # Reuse a matrix written by a previous process if the library hasn't changed
+        if not (matrix_path.exists() and ids_path.exists()):
+            for stale in self.directory.glob(f"user_{user_id}_*"):
+                stale.unlink()
+            ids = np.empty(count, dtype=np.int64)
+            matrix = np.memmap(matrix_path, dtype=np.float32, mode="w+", shape=(count, self.dim))
+            for row, (job_id, blob) in enumerate(self._rows(db, user_id)):
+                ids[row] = job_id
+                matrix[row] = from_blob(blob)
+            matrix.flush()
+            del matrix
+            np.save(ids_path, ids)
+
+        ids = np.load(ids_path)
+        matrix = np.memmap(matrix_path, dtype=np.float32, mode="r", shape=(len(ids), self.dim))
+        return ids, matrix
+
+    def _cached(self, user_id: int, signature: Tuple[int, int, int]):
+        with self._lock:
+            cached = self._cache.get(user_id)
+            if cached and cached[0] == signature:
+                self._cache.move_to_end(user_id)
+                return cached[1], cached[2]
+        return None
+
+    def _matrix(self, db: Session, user_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        signature = self._signature(db, user_id)
+        cached = self._cached(user_id, signature)
+        if cached:
+            return cached
+
+        with self._user_locks[user_id % LOCK_STRIPES]:
+            # Another request for this user may have rebuilt it while we waited
+            cached = self._cached(user_id, signature)
+            if cached:
+                return cached
+
+            if signature[0] >= self.mmap_threshold:
+                ids, matrix = self._build_mmap(db, user_id, signature)
+            else:
+                ids, matrix = self._build_in_memory(db, user_id)
+
+            with self._lock:
+                self._cache[user_id] = (signature, ids, matrix)
+                self._cache.move_to_end(user_id)
+                while len(self._cache) > self.cache_users:
+                    self._cache.popitem(last=False)
+            return ids, matrix
+
+    def rank(self, db: Session, user_id: int, text: str, k: int = 5) -> List[Tuple[int, float]]:
+        """Returns up to k (job_id, cosine score) pairs, best first."""
+        ids, matrix = self._matrix(db, user_id)
+        if len(ids) == 0 or k <= 0:
+            return []
+
+        query = embed(text, self.dim)
+        scores = np.empty(len(ids), dtype=np.float32)
+        for start in range(0, len(ids), SCORE_BATCH):
+            scores[start:start + SCORE_BATCH] = matrix[start:start + SCORE_BATCH] @ query
+
+        k = min(k, len(ids))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(ids[i]), float(scores[i])) for i in top]
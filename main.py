@@ -2,8 +2,9 @@ from fastapi import FastAPI, HTTPException, UploadFile, File, Form
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List
 from agent import Agent
+import job_index
 import os
 import io
 from pypdf import PdfReader
@@ -19,6 +20,11 @@ from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from datetime import timedelta
 import models, database, auth
+import archive
+import capture
+import prefetch
+import asyncio
+import config
 
 load_dotenv()
 
@@ -26,6 +32,10 @@ models.Base.metadata.create_all(bind=database.engine)
 
 app = FastAPI()
 
+# Opt-in traffic capture; also feeds replayed LLM latencies when running with LLM_STUB
+if config.CAPTURE_ENABLED or config.LLM_STUB:
+    app.add_middleware(capture.CaptureMiddleware)
+
 # Ensure generated directory exists
 GENERATED_DIR = Path("static/generated")
 GENERATED_DIR.mkdir(parents=True, exist_ok=True)
@@ -33,6 +43,24 @@ GENERATED_DIR.mkdir(parents=True, exist_ok=True)
 # Initialize the agent
 agent = Agent()
 
+# Opt-in speculative tool analyses after /api/update_context (config.PREFETCH_ENABLED)
+prefetcher = prefetch.Prefetcher(agent)
+
+async def get_prefetched(user_id: int, kind: str, *args: str) -> Optional[str]:
+    future = prefetcher.lookup(user_id, kind, *args)
+    if future is None:
+        return None
+    return await asyncio.wrap_future(future)
+
+@app.on_event("startup")
+async def start_message_maintenance():
+    # Periodic archival, retention and VACUUM of chat history
+    if config.MAINTENANCE_INTERVAL_HOURS > 0:
+        app.state.maintenance_task = asyncio.create_task(archive.maintenance_loop())
+
+# Saved jobs similarity index (local embeddings, no LLM calls)
+jobs_index = job_index.JobIndex()
+
 class ChatRequest(BaseModel):
     message: str
 
@@ -60,7 +88,7 @@ class Token(BaseModel):
 @app.post("/api/chat", response_model=ChatResponse)
 async def chat_endpoint(request: ChatRequest, db: Session = Depends(auth.get_db), current_user: models.User = Depends(auth.get_current_user)):
     # 1. Load history from DB
-    db_messages = db.query(models.Message).filter(models.Message.user_id == current_user.id).order_by(models.Message.timestamp.asc()).all()
+    db_messages = db.query(models.Message.role, models.Message.content).filter(models.Message.user_id == current_user.id).order_by(models.Message.timestamp.asc()).all()
     
     
     # 3. Inject Context if available
@@ -123,6 +151,7 @@ async def update_context(
         current_user.jd_text = job_description
         
     db.commit()
+    prefetcher.schedule(current_user.id, current_user.cv_text, current_user.jd_text)
     return {"status": "success", "message": "Context updated"}
 
 @app.post("/api/tailor_cv", response_model=ChatResponse)
@@ -180,7 +209,7 @@ async def analyze_jd_endpoint(file: UploadFile = File(...), job_description: str
         cv_text = ""
         for page in pdf_reader.pages:
             cv_text += page.extract_text() + "\n"
-        response = agent.analyze_jd(job_description, cv_text)
+        response = await get_prefetched(current_user.id, "gap", job_description, cv_text) or agent.analyze_jd(job_description, cv_text)
         return ChatResponse(response=response)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
@@ -195,7 +224,7 @@ async def extract_skills_endpoint(file: UploadFile = File(...), current_user: mo
         cv_text = ""
         for page in pdf_reader.pages:
             cv_text += page.extract_text() + "\n"
-        response = agent.extract_skills(cv_text)
+        response = await get_prefetched(current_user.id, "skills", cv_text) or agent.extract_skills(cv_text)
         return ChatResponse(response=response)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
@@ -210,7 +239,7 @@ async def ats_score_endpoint(file: UploadFile = File(...), current_user: models.
         cv_text = ""
         for page in pdf_reader.pages:
             cv_text += page.extract_text() + "\n"
-        response = agent.estimate_ats_score(cv_text)
+        response = await get_prefetched(current_user.id, "ats", cv_text) or agent.estimate_ats_score(cv_text)
         return ChatResponse(response=response)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
@@ -220,9 +249,67 @@ class SummarizeRequest(BaseModel):
 
 @app.post("/api/summarize_jd", response_model=ChatResponse)
 async def summarize_jd_endpoint(request: SummarizeRequest, current_user: models.User = Depends(auth.get_current_user)):
-    response = agent.summarize_jd(request.job_description)
+    response = await get_prefetched(current_user.id, "summary", request.job_description) or agent.summarize_jd(request.job_description)
     return ChatResponse(response=response)
 
+class SavedJobCreate(BaseModel):
+    title: str
+    company: Optional[str] = None
+    description: str
+
+class SavedJobResponse(BaseModel):
+    id: int
+    title: str
+    company: Optional[str] = None
+    score: Optional[float] = None
+    class Config:
+        from_attributes = True
+
+@app.post("/api/jobs", response_model=SavedJobResponse)
+def save_job(job: SavedJobCreate, db: Session = Depends(auth.get_db), current_user: models.User = Depends(auth.get_current_user)):
+    embedding = job_index.embed(f"{job.title}\n{job.description}")
+    db_job = models.SavedJob(
+        user_id=current_user.id,
+        title=job.title,
+        company=job.company,
+        description=job.description,
+        embedding=job_index.to_blob(embedding),
+    )
+    db.add(db_job)
+    db.commit()
+    db.refresh(db_job)
+    return db_job
+
+@app.get("/api/jobs", response_model=List[SavedJobResponse])
+def list_jobs(db: Session = Depends(auth.get_db), current_user: models.User = Depends(auth.get_current_user)):
+    return db.query(models.SavedJob).filter(models.SavedJob.user_id == current_user.id).order_by(models.SavedJob.created_at.desc()).all()
+
+@app.get("/api/jobs/rank", response_model=List[SavedJobResponse])
+def rank_jobs(k: int = 5, db: Session = Depends(auth.get_db), current_user: models.User = Depends(auth.get_current_user)):
+    if not current_user.cv_text:
+        raise HTTPException(status_code=400, detail="Upload a CV first via /api/update_context")
+    ranked = jobs_index.rank(db, current_user.id, current_user.cv_text, k=k)
+    if not ranked:
+        return []
+    jobs = {
+        job.id: job
+        for job in db.query(models.SavedJob).filter(models.SavedJob.id.in_([job_id for job_id, _ in ranked])).all()
+    }
+    return [
+        SavedJobResponse(id=job_id, title=jobs[job_id].title, company=jobs[job_id].company, score=score)
+        for job_id, score in ranked
+        if job_id in jobs
+    ]
+
+@app.delete("/api/jobs/{job_id}")
+def delete_job(job_id: int, db: Session = Depends(auth.get_db), current_user: models.User = Depends(auth.get_current_user)):
+    db_job = db.query(models.SavedJob).filter(models.SavedJob.id == job_id, models.SavedJob.user_id == current_user.id).first()
+    if not db_job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    db.delete(db_job)
+    db.commit()
+    return {"status": "success", "message": "Job deleted"}
+
 # Mount static files
 @app.post("/api/register", response_model=UserResponse)
 def register_user(user: UserCreate, db: Session = Depends(auth.get_db)):
@@ -1,7 +1,32 @@
-from sqlalchemy import Boolean, Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Boolean, Column, Integer, String, DateTime, ForeignKey, LargeBinary
 from sqlalchemy.orm import relationship
+from sqlalchemy.types import TypeDecorator
 from database import Base
+import config
 import datetime
+import zlib
+
+class CompressedText(TypeDecorator):
+    """
+    Text column that stores values above config.MESSAGE_COMPRESS_THRESHOLD as zlib blobs.
+    SQLite keeps the storage class per value, so plain and compressed rows share one column
+    and existing uncompressed rows still read back unchanged.
+    """
+    impl = String
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return value
+        raw = value.encode("utf-8")
+        if len(raw) < config.MESSAGE_COMPRESS_THRESHOLD:
+            return value
+        return zlib.compress(raw, 6)
+
+    def process_result_value(self, value, dialect):
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return zlib.decompress(value).decode("utf-8")
+        return value
 
 class User(Base):
     __tablename__ = "users"
@@ -18,6 +43,7 @@ class User(Base):
     jd_text = Column(String, nullable=True)
 
     messages = relationship("Message", back_populates="user")
+    saved_jobs = relationship("SavedJob", back_populates="user")
 
 class Message(Base):
     __tablename__ = "messages"
@@ -25,7 +51,33 @@ class Message(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     role = Column(String) # "user" or "assistant"
-    content = Column(String)
+    content = Column(CompressedText)
     timestamp = Column(DateTime, default=datetime.datetime.utcnow)
 
     user = relationship("User", back_populates="messages")
+
+class ArchivedMessage(Base):
+    """Cold storage for messages moved out of the live table by archive.run_maintenance."""
+    __tablename__ = "archived_messages"
+
+    id = Column(Integer, primary_key=True, index=True)
+    original_id = Column(Integer, index=True) # messages.id at archive time; SQLite may reuse it for newer messages
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    role = Column(String)
+    content = Column(CompressedText)
+    timestamp = Column(DateTime)
+    archived_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
+
+class SavedJob(Base):
+    __tablename__ = "saved_jobs"
+    __table_args__ = {"sqlite_autoincrement": True} # Never reuse ids of deleted jobs
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    title = Column(String)
+    company = Column(String, nullable=True)
+    description = Column(String)
+    embedding = Column(LargeBinary) # float32 vector from job_index.embed
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+    user = relationship("User", back_populates="saved_jobs")
@@ -0,0 +1,224 @@
+import hashlib
+import os
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Deque, Dict, Optional
+
+import config
+
+PREFETCH_NICENESS = 10
+
+
+def _lower_priority():
+    """Runs in each prefetch worker thread; on Linux setpriority with a thread id only affects that thread."""
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), PREFETCH_NICENESS)
+    except (AttributeError, OSError):
+        pass
+
+
+def _key(kind: str, *args: str) -> str:
+    digest = hashlib.sha256("\0".join(args).encode("utf-8")).hexdigest()
+    return f"{kind}:{digest}"
+
+
+class Prefetcher:
+    """
+    Speculatively runs the tool analyses (skills, ATS, JD summary, gap analysis) for a user's
+    stored context so the tool endpoints can answer from memory.
+    Results are keyed by a hash of their inputs, so a tool request only hits if it carries the same CV/JD text.
+    """
+
+    def __init__(self, agent, enabled: bool = config.PREFETCH_ENABLED, workers: int = config.PREFETCH_WORKERS,
+                 max_pending: int = config.PREFETCH_MAX_PENDING, max_per_hour: int = config.PREFETCH_MAX_PER_HOUR,
+                 jd_settle_seconds: float = config.PREFETCH_JD_SETTLE_SECONDS, ttl_seconds: float = config.PREFETCH_TTL_SECONDS,
+                 stats_log_seconds: float = config.PREFETCH_STATS_LOG_SECONDS):
+        self.agent = agent
+        self.enabled = enabled
+        self.max_pending = max_pending
+        self.max_per_hour = max_per_hour
+        self.jd_settle_seconds = jd_settle_seconds
+        self.ttl_seconds = ttl_seconds
+        self.stats_log_seconds = stats_log_seconds
+        self._last_stats_log = time.monotonic()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch", initializer=_lower_priority)
+        # Re-entrant: Future.cancel() runs _on_done synchronously while the lock is held
+        self._lock = threading.RLock()
+        # user_id -> key -> {"future", "timer", "used", "created"}; "future" is None while waiting to settle
+        self._entries: Dict[int, Dict[str, dict]] = {}
+        self._recent: Dict[int, Deque[float]] = {}
+        self._pending = 0
+        self.stats = Counter()
+
+    def _tasks(self, cv_text: Optional[str], jd_text: Optional[str]):
+        """(kind, fn, args, depends_on_jd) for every analysis the context allows."""
+        tasks = []
+        if cv_text:
+            tasks.append(("skills", self.agent.extract_skills, (cv_text,), False))
+            tasks.append(("ats", self.agent.estimate_ats_score, (cv_text,), False))
+        if jd_text:
+            tasks.append(("summary", self.agent.summarize_jd, (jd_text,), True))
+        if cv_text and jd_text:
+            tasks.append(("gap", self.agent.analyze_jd, (jd_text, cv_text), True))
+        return tasks
+
+    def _within_budget(self, user_id: int, now: float) -> bool:
+        """Per-user LLM call budget, charged only when work is actually submitted; callers hold the lock."""
+        recent = self._recent.setdefault(user_id, deque())
+        while recent and now - recent[0] > 3600:
+            recent.popleft()
+        return len(recent) < self.max_per_hour
+
+    def _drop(self, entry: dict, reason: str):
+        """Discards an entry; callers hold the lock. Unused work is counted as cancelled if it never started, else as wasted."""
+        if entry["used"]:
+            return
+        if entry["timer"] is not None:
+            entry["timer"].cancel()
+        if entry["future"] is None or entry["future"].cancel():
+            self.stats["cancelled"] += 1
+        else:
+            self.stats[reason] += 1
+
+    def _expire(self, now: float):
+        """Evicts entries older than the TTL so memory stays bounded; callers hold the lock."""
+        for user_id in list(self._entries):
+            entries = self._entries[user_id]
+            for key in [k for k, e in entries.items() if now - e["created"] > self.ttl_seconds]:
+                self._drop(entries.pop(key), "wasted")
+            if not entries:
+                del self._entries[user_id]
+        for user_id in [u for u, recent in self._recent.items() if not recent or now - recent[-1] > 3600]:
+            del self._recent[user_id]
+
+    def schedule(self, user_id: int, cv_text: Optional[str], jd_text: Optional[str]):
+        """
+        Called after the user's context changes. Only analyses whose inputs changed are cancelled and requeued;
+        JD-dependent ones wait jd_settle_seconds because the frontend syncs the JD while the user types.
+        """
+        if not self.enabled:
+            return
+
+        now = time.monotonic()
+        tasks = {_key(kind, *args): (fn, args, depends_on_jd) for kind, fn, args, depends_on_jd in self._tasks(cv_text, jd_text)}
+
+        with self._lock:
+            self._expire(now)
+            entries = self._entries.setdefault(user_id, {})
+            for key in [k for k in entries if k not in tasks]:
+                self._drop(entries.pop(key), "wasted")
+
+            for key, (fn, args, depends_on_jd) in tasks.items():
+                if key in entries:
+                    continue # Inputs unchanged, keep existing work
+                if self._pending >= self.max_pending:
+                    self.stats["skipped_busy"] += 1
+                    continue
+                entry = {"future": None, "timer": None, "used": False, "created": now}
+                entries[key] = entry
+                if depends_on_jd and self.jd_settle_seconds > 0:
+                    entry["timer"] = threading.Timer(self.jd_settle_seconds, self._submit, args=(user_id, key, fn, args))
+                    entry["timer"].daemon = True
+                    entry["timer"].start()
+                else:
+                    self._submit(user_id, key, fn, args)
+
+        self._log_stats(now)
+
+    def _submit(self, user_id: int, key: str, fn, args):
+        """Queues the LLM call. JD edits cancelled while settling never reach this, so they cost no budget."""
+        with self._lock:
+            entries = self._entries.get(user_id, {})
+            entry = entries.get(key)
+            if entry is None or entry["future"] is not None:
+                return # Superseded or looked up while settling
+            entry["timer"] = None
+            now = time.monotonic()
+            if self._pending >= self.max_pending:
+                entries.pop(key)
+                self.stats["skipped_busy"] += 1
+                return
+            if not self._within_budget(user_id, now):
+                entries.pop(key)
+                self.stats["skipped_budget"] += 1
+                return
+            self._recent[user_id].append(now)
+            self.stats["scheduled"] += 1
+            self._pending += 1
+            entry["future"] = self._executor.submit(self._run, user_id, key, entry, fn, args)
+            entry["future"].add_done_callback(self._on_done)
+
+    def _on_done(self, future: Future):
+        with self._lock:
+            self._pending -= 1
+
+    def _run(self, user_id: int, key: str, entry: dict, fn, args) -> Optional[str]:
+        with self._lock:
+            if self._entries.get(user_id, {}).get(key) is not entry:
+                return None # Context changed while queued
+        try:
+            result = fn(*args)
+        except Exception as e:
+            print(f"Error in prefetch: {e}")
+            result = None
+
+        with self._lock:
+            if not result or result.startswith("Error"):
+                self.stats["errors"] += 1
+                # Forget the failure so the next lookup is a miss and the next schedule can retry
+                entries = self._entries.get(user_id, {})
+                if entries.get(key) is entry:
+                    entries.pop(key)
+                if entry["used"]:
+                    # The caller waiting on this future falls back to a live call
+                    self.stats["used"] -= 1
+                    self.stats["hits"] -= 1
+                    self.stats["misses"] += 1
+                return None
+            self.stats["completed"] += 1
+        return result
+
+    def lookup(self, user_id: int, kind: str, *args: str) -> Optional[Future]:
+        """
+        Returns the prefetch future for these exact inputs if it is running or done, else None (a miss).
+        Work still queued or settling is cancelled instead: waiting behind other low-priority prefetches
+        would be slower than the caller making the call live.
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            self._expire(time.monotonic())
+            entries = self._entries.get(user_id, {})
+            key = _key(kind, *args)
+            entry = entries.get(key)
+            future = entry["future"] if entry else None
+            if future is None or not (future.running() or future.done()) or future.cancelled():
+                if entry is not None:
+                    self._drop(entries.pop(key), "wasted")
+                self.stats["misses"] += 1
+                return None
+            if not entry["used"]:
+                entry["used"] = True
+                self.stats["used"] += 1
+            self.stats["hits"] += 1
+            return future
+
+    def _log_stats(self, now: float):
+        """Prints the snapshot every stats_log_seconds; the counters are server-wide, so they are not exposed over the API."""
+        if self.stats_log_seconds <= 0 or now - self._last_stats_log < self.stats_log_seconds:
+            return
+        self._last_stats_log = now
+        print(f"Prefetch stats: {self.snapshot()}")
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            self._expire(time.monotonic())
+            stats = dict(self.stats)
+            stats["pending"] = self._pending
+            stats["entries"] = sum(len(entries) for entries in self._entries.values())
+        lookups = stats.get("hits", 0) + stats.get("misses", 0)
+        stats["hit_rate"] = stats.get("hits", 0) / lookups if lookups else 0.0
+        return stats
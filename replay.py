@@ -0,0 +1,232 @@
+"""
+Replays traffic recorded by capture.CaptureMiddleware against a local instance and reports latency deltas.
+
+Start the target with LLM_STUB=true so LLM calls are simulated instead of hitting Hugging Face:
+
+    LLM_STUB=true uvicorn main:app --port 8000
+    python replay.py captures/capture.jsonl --speed 4 --llm recorded
+
+Original timings are measured server-side by the middleware, replay timings client-side,
+so small deltas include local HTTP overhead.
+"""
+import argparse
+import json
+import re
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import requests
+
+PATH_PARAM_RE = re.compile(r"\{[^}]+\}")
+FILLER = "experience python project team data analysis communication leadership "
+REPLAY_PASSWORD = "replay-password"
+
+
+def load_records(paths: List[str]) -> List[dict]:
+    records = []
+    for path in paths:
+        with open(path) as f:
+            records.extend(json.loads(line) for line in f if line.strip())
+    return sorted(records, key=lambda r: r["ts"])
+
+
+def filler_text(length: int) -> str:
+    return (FILLER * (length // len(FILLER) + 1))[:length]
+
+
+def synthetic_pdf(size: int) -> bytes:
+    """Minimal single-page PDF whose extractable text roughly matches the recorded upload size."""
+    text = filler_text(max(size - 600, 80))
+    lines = [text[i:i + 80] for i in range(0, len(text), 80)]
+    stream = "BT /F1 10 Tf 40 800 Td 12 TL " + " ".join(f"({line}) '" for line in lines) + " ET"
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] /Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream",
+    ]
+    out = "%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n"
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+    return out.encode("latin-1")
+
+
+def synthesize_json(shape):
+    if isinstance(shape, dict):
+        return {k: synthesize_json(v) for k, v in shape.items()}
+    if isinstance(shape, list):
+        return [synthesize_json(v) for v in shape]
+    if isinstance(shape, int):
+        return filler_text(shape)
+    return {"int": 1, "float": 0.0, "bool": True}.get(shape)
+
+
+class Replayer:
+    def __init__(self, base_url: str, speed: float, llm_mode: str, concurrency: int):
+        self.base_url = base_url.rstrip("/")
+        self.speed = speed
+        self.llm_mode = llm_mode
+        self.run_id = uuid.uuid4().hex[:8]
+        self.session = requests.Session()
+        self.session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=concurrency))
+        self._executor = ThreadPoolExecutor(max_workers=concurrency)
+        self._tokens: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.results: List[dict] = []
+
+    def _email(self, client: Optional[str]) -> str:
+        return f"replay_{client or 'anon'}_{self.run_id}@example.com"
+
+    def provision(self, records: List[dict]):
+        """
+        Registers one synthetic user per anonymised client so authenticated routes can be replayed,
+        plus a shared user for logins, which carry no bearer token and so have no client id.
+        """
+        for client in [None] + sorted({r["client"] for r in records if r.get("client")}):
+            email = self._email(client)
+            self.session.post(f"{self.base_url}/api/register", json={"email": email, "password": REPLAY_PASSWORD, "full_name": "Replay User"})
+            response = self.session.post(f"{self.base_url}/api/token", data={"username": email, "password": REPLAY_PASSWORD})
+            response.raise_for_status()
+            if client:
+                self._tokens[client] = response.json()["access_token"]
+
+    def _build(self, record: dict) -> dict:
+        kwargs = {"params": record.get("query") or None, "headers": {}}
+        client = record.get("client")
+        if client in self._tokens:
+            kwargs["headers"]["Authorization"] = f"Bearer {self._tokens[client]}"
+        if self.llm_mode == "recorded" and record.get("llm_calls"):
+            kwargs["headers"]["x-replay-llm"] = json.dumps([
+                {"duration_ms": call["duration_ms"], "response_chars": call["response_chars"]}
+                for call in record["llm_calls"]
+            ])
+
+        shape = record.get("body") or {}
+        if record["path"] == "/api/token":
+            kwargs["data"] = {"username": self._email(client), "password": REPLAY_PASSWORD}
+        elif record["path"] == "/api/register":
+            kwargs["json"] = {"email": f"replay_{uuid.uuid4().hex}@example.com", "password": REPLAY_PASSWORD, "full_name": "Replay User"}
+        elif "json" in shape:
+            kwargs["json"] = synthesize_json(shape["json"])
+        elif "fields" in shape:
+            kwargs["data"] = {name: filler_text(length) for name, length in shape["fields"].items()}
+            files = {}
+            for name, meta in shape.get("files", {}).items():
+                size = meta.get("size") or 0
+                content = synthetic_pdf(size) if meta.get("ext") == ".pdf" else filler_text(size).encode("utf-8")
+                files[name] = (f"replay{meta.get('ext', '')}", content)
+            kwargs["files"] = files or None
+        return kwargs
+
+    def _send(self, record: dict):
+        url = self.base_url + PATH_PARAM_RE.sub("0", record["path"])
+        kwargs = self._build(record)
+        start = time.perf_counter()
+        try:
+            status = self.session.request(record["method"], url, timeout=300, **kwargs).status_code
+        except requests.RequestException as e:
+            print(f"Error replaying {record['method']} {record['path']}: {e}")
+            status = None
+        duration_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self.results.append({
+                "route": f"{record['method']} {record['path']}",
+                "original_ms": record["duration_ms"],
+                "replay_ms": duration_ms,
+                "original_status": record["status"],
+                "replay_status": status,
+            })
+
+    def run(self, records: List[dict]):
+        """Open-loop replay: requests are sent on the original schedule (divided by speed), not after the previous one returns."""
+        self.provision(records)
+        if not records:
+            return
+        origin = records[0]["ts"]
+        start = time.perf_counter()
+        for record in records:
+            delay = (record["ts"] - origin) / self.speed - (time.perf_counter() - start)
+            if delay > 0:
+                time.sleep(delay)
+            self._executor.submit(self._send, record)
+        self._executor.shutdown(wait=True)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summarize(results: List[dict]) -> List[dict]:
+    groups = defaultdict(list)
+    for result in results:
+        groups[result["route"]].append(result)
+    groups["ALL"] = results
+
+    rows = []
+    for route, items in sorted(groups.items()):
+        original = [r["original_ms"] for r in items]
+        replay = [r["replay_ms"] for r in items]
+        rows.append({
+            "route": route,
+            "count": len(items),
+            "original_p50": percentile(original, 50),
+            "replay_p50": percentile(replay, 50),
+            "original_p95": percentile(original, 95),
+            "replay_p95": percentile(replay, 95),
+            "delta_p50": percentile(replay, 50) - percentile(original, 50),
+            "delta_p95": percentile(replay, 95) - percentile(original, 95),
+            "status_mismatches": sum(r["original_status"] != r["replay_status"] for r in items),
+        })
+    return rows
+
+
+def print_report(rows: List[dict]):
+    header = f"{'route':<32} {'n':>6} {'p50 orig':>10} {'p50 new':>10} {'Δp50':>9} {'p95 orig':>10} {'p95 new':>10} {'Δp95':>9} {'status≠':>8}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        print(
+            f"{row['route']:<32} {row['count']:>6} "
+            f"{row['original_p50']:>10.1f} {row['replay_p50']:>10.1f} {row['delta_p50']:>+9.1f} "
+            f"{row['original_p95']:>10.1f} {row['replay_p95']:>10.1f} {row['delta_p95']:>+9.1f} "
+            f"{row['status_mismatches']:>8}"
+        )
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Replay captured traffic against a local instance.")
+    parser.add_argument("captures", nargs="+", help="capture*.jsonl files written by CaptureMiddleware")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--speed", type=float, default=1.0, help="Arrival-rate multiplier (1 = original pacing)")
+    parser.add_argument("--llm", choices=["recorded", "synthetic"], default="recorded",
+                        help="recorded: replay captured LLM latencies; synthetic: server uses LLM_STUB_LATENCY_MS")
+    parser.add_argument("--concurrency", type=int, default=64, help="Max in-flight requests")
+    parser.add_argument("--report", help="Also write the summary rows as JSON to this path")
+    args = parser.parse_args(argv)
+
+    records = load_records(args.captures)
+    print(f"Replaying {len(records)} requests at {args.speed}x against {args.base_url}...")
+    replayer = Replayer(args.base_url, args.speed, args.llm, args.concurrency)
+    replayer.run(records)
+
+    rows = summarize(replayer.results) if replayer.results else []
+    print_report(rows)
+    if args.report:
+        Path(args.report).write_text(json.dumps(rows, indent=2))
+
+
+if __name__ == "__main__":
+    main()
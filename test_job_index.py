@@ -0,0 +1,92 @@
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import job_index
+import models
+
+JOBS = [
+    ("Data Analyst", "SQL, Python and Tableau dashboards for the finance team."),
+    ("Frontend Developer", "React, TypeScript and CSS for our customer web app."),
+    ("Nurse", "Patient care on a busy hospital ward, night shifts."),
+]
+CV = "Graduate with Python and SQL experience, built Tableau dashboards for a finance society."
+
+
+def make_session():
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)()
+
+
+def save(db, user_id, title, description):
+    job = models.SavedJob(
+        user_id=user_id,
+        title=title,
+        description=description,
+        embedding=job_index.to_blob(job_index.embed(f"{title}\n{description}")),
+    )
+    db.add(job)
+    db.commit()
+    return job
+
+
+def check_index(index):
+    db = make_session()
+    user = models.User(email="ranker@example.com", full_name="Ranker")
+    db.add(user)
+    db.commit()
+    jobs = [save(db, user.id, title, description) for title, description in JOBS]
+
+    print("Testing rank ordering...")
+    ranked = index.rank(db, user.id, CV, k=2)
+    assert [job_id for job_id, _ in ranked][0] == jobs[0].id, ranked
+    assert len(ranked) == 2 and ranked[0][1] >= ranked[1][1], ranked
+
+    # Delete the newest job and save a new one: SQLite may hand out the same id again
+    print("Testing cache invalidation after delete + save...")
+    db.delete(jobs[-1])
+    db.commit()
+    time.sleep(0.01)
+    replacement = save(db, user.id, "", CV)
+    ranked = index.rank(db, user.id, CV, k=3)
+    assert ranked[0][0] == replacement.id and ranked[0][1] > 0.99, ranked
+
+
+def test_embed_is_normalised_and_stable():
+    vec = job_index.embed(CV)
+    assert abs(float((vec ** 2).sum()) - 1.0) < 1e-5
+    assert (job_index.from_blob(job_index.to_blob(vec)) == job_index.embed(CV)).all()
+    assert not job_index.embed("").any()
+
+
+def test_rank_in_memory():
+    check_index(job_index.JobIndex(mmap_threshold=10_000))
+
+
+def test_rank_mmap():
+    with tempfile.TemporaryDirectory() as directory:
+        check_index(job_index.JobIndex(directory=directory, mmap_threshold=1))
+
+
+def test_cache_is_bounded():
+    index = job_index.JobIndex(cache_users=1)
+    db = make_session()
+    for user_id in (1, 2):
+        save(db, user_id, *JOBS[0])
+        index.rank(db, user_id, CV)
+    assert list(index._cache) == [2]
+
+
+if __name__ == "__main__":
+    try:
+        test_embed_is_normalised_and_stable()
+        test_rank_in_memory()
+        test_rank_mmap()
+        test_cache_is_bounded()
+        print("\n✅ All Job Index Tests Passed!")
+    except AssertionError as e:
+        print(f"\n❌ Tests Failed: {e}")
+        exit(1)
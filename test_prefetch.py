@@ -0,0 +1,177 @@
+import threading
+import time
+
+import prefetch
+
+
+class FakeAgent:
+    """Records calls; extract_skills blocks until `release` is set so other work stays queued."""
+
+    def __init__(self):
+        self.calls = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def extract_skills(self, cv):
+        self.calls.append(("skills", cv))
+        self.release.wait(5)
+        return f"skills for {cv}"
+
+    def estimate_ats_score(self, cv):
+        self.calls.append(("ats", cv))
+        return "ats"
+
+    def summarize_jd(self, jd):
+        self.calls.append(("summary", jd))
+        return "summary"
+
+    def analyze_jd(self, jd, cv):
+        self.calls.append(("gap", jd))
+        return "gap"
+
+
+def wait_idle(prefetcher):
+    deadline = time.time() + 5
+    while prefetcher.snapshot()["pending"] and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def test_hit_and_miss():
+    print("Testing hits and misses...")
+    agent = FakeAgent()
+    p = prefetch.Prefetcher(agent, enabled=True, jd_settle_seconds=0)
+    p.schedule(1, "cv", "jd")
+    wait_idle(p)
+
+    assert p.lookup(1, "skills", "cv").result() == "skills for cv"
+    assert p.lookup(1, "gap", "jd", "cv").result() == "gap"
+    assert p.lookup(1, "skills", "other cv") is None
+    stats = p.snapshot()
+    assert stats["hits"] == 2 and stats["misses"] == 1 and stats["used"] == 2, stats
+
+
+def test_queued_lookup_is_a_miss():
+    print("Testing lookup of queued work...")
+    agent = FakeAgent()
+    agent.release.clear()
+    p = prefetch.Prefetcher(agent, enabled=True, workers=1, jd_settle_seconds=0)
+    p.schedule(1, "cv", None)
+    time.sleep(0.05)
+
+    # ats is queued behind the blocked skills call: caller should go live, not wait
+    assert p.lookup(1, "ats", "cv") is None
+    agent.release.set()
+    wait_idle(p)
+    assert ("ats", "cv") not in agent.calls
+    stats = p.snapshot()
+    assert stats["misses"] == 1 and stats["cancelled"] == 1, stats
+
+
+def test_jd_change_keeps_cv_results():
+    print("Testing JD edits only requeue JD analyses...")
+    agent = FakeAgent()
+    p = prefetch.Prefetcher(agent, enabled=True, jd_settle_seconds=0.2)
+    p.schedule(1, "cv", "jd v1")
+    p.schedule(1, "cv", "jd v2") # Before v1 settled
+    time.sleep(0.4)
+    wait_idle(p)
+
+    assert agent.calls.count(("skills", "cv")) == 1
+    assert ("summary", "jd v1") not in agent.calls and ("summary", "jd v2") in agent.calls
+    stats = p.snapshot()
+    # Budget is only charged for calls that were submitted: skills, ats, summary v2, gap v2
+    assert stats["cancelled"] == 2 and stats["scheduled"] == 4, stats
+
+
+def test_jd_typing_does_not_exhaust_budget():
+    print("Testing many JD edits inside the settle window...")
+    agent = FakeAgent()
+    p = prefetch.Prefetcher(agent, enabled=True, jd_settle_seconds=0.2, max_per_hour=4)
+    for draft in range(12):
+        p.schedule(1, "cv", f"jd draft {draft}")
+    time.sleep(0.4)
+    wait_idle(p)
+
+    assert ("summary", "jd draft 11") in agent.calls and ("gap", "jd draft 11") in agent.calls, agent.calls
+    assert p.lookup(1, "summary", "jd draft 11").result() == "summary"
+    stats = p.snapshot()
+    assert stats["scheduled"] == 4 and stats.get("skipped_budget", 0) == 0, stats
+
+
+class FailingAgent(FakeAgent):
+    def __init__(self, fail_with_exception: bool):
+        super().__init__()
+        self.fail_with_exception = fail_with_exception
+
+    def extract_skills(self, cv):
+        self.calls.append(("skills", cv))
+        self.release.wait(5)
+        if self.fail_with_exception:
+            raise RuntimeError("upstream down")
+        return "Error: upstream down"
+
+
+def test_failed_prefetch_is_a_miss_and_retried():
+    for fail_with_exception in (True, False):
+        print(f"Testing failed prefetch (exception={fail_with_exception})...")
+        agent = FailingAgent(fail_with_exception)
+        p = prefetch.Prefetcher(agent, enabled=True, jd_settle_seconds=0)
+        p.schedule(1, "cv", None)
+        wait_idle(p)
+
+        assert p.lookup(1, "skills", "cv") is None
+        p.schedule(1, "cv", None) # Same inputs: the failed analysis is queued again
+        wait_idle(p)
+        assert agent.calls.count(("skills", "cv")) == 2, agent.calls
+        stats = p.snapshot()
+        assert stats.get("hits", 0) == 0 and stats["misses"] == 1 and stats["errors"] == 2, stats
+
+
+def test_failure_after_lookup_counts_as_miss():
+    print("Testing prefetch that fails while a caller waits on it...")
+    agent = FailingAgent(fail_with_exception=True)
+    agent.release.clear()
+    p = prefetch.Prefetcher(agent, enabled=True, jd_settle_seconds=0)
+    p.schedule(1, "cv", None)
+    time.sleep(0.05)
+
+    future = p.lookup(1, "skills", "cv")
+    assert future is not None
+    agent.release.set()
+    assert future.result() is None
+    stats = p.snapshot()
+    assert stats.get("hits", 0) == 0 and stats.get("used", 0) == 0 and stats["misses"] == 1, stats
+
+
+def test_unused_results_expire_as_wasted():
+    print("Testing expiry of unused results...")
+    p = prefetch.Prefetcher(FakeAgent(), enabled=True, jd_settle_seconds=0, ttl_seconds=0.1)
+    p.schedule(1, "cv", None)
+    wait_idle(p)
+    time.sleep(0.2)
+
+    stats = p.snapshot()
+    assert stats["wasted"] == 2 and stats["entries"] == 0, stats
+
+
+def test_budget():
+    print("Testing per-user budget...")
+    p = prefetch.Prefetcher(FakeAgent(), enabled=True, jd_settle_seconds=0, max_per_hour=2)
+    p.schedule(1, "cv", "jd")
+    assert p.snapshot()["skipped_budget"] == 2
+
+
+if __name__ == "__main__":
+    try:
+        test_hit_and_miss()
+        test_queued_lookup_is_a_miss()
+        test_jd_change_keeps_cv_results()
+        test_jd_typing_does_not_exhaust_budget()
+        test_failed_prefetch_is_a_miss_and_retried()
+        test_failure_after_lookup_counts_as_miss()
+        test_unused_results_expire_as_wasted()
+        test_budget()
+        print("\n✅ All Prefetch Tests Passed!")
+    except AssertionError as e:
+        print(f"\n❌ Tests Failed: {e}")
+        exit(1)